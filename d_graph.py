@@ -7,6 +7,225 @@
 #    For educational use only,
 #    Not for commercial use
 
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
+
+# Graphs up to this many vertices also keep each row as a bitmask
+_SMALL_GRAPH = 64
+
+# Smaller graphs are not worth the cost of starting worker processes
+_PARALLEL_MIN_VERTICES = 512
+
+
+def _dfs_csr(indptr: list, indices: list, v_start: int, v_end) -> list:
+    """
+    Depth-first search over CSR arrays, stops at v_end if given
+    """
+    # Visit flags for O(1) lookups, order keeps the output sequence
+    visited = bytearray(len(indptr) - 1)
+    order = []
+
+    # Stack goes as deep as possible, then back-tracks
+    stack = [v_start]
+    push, pop, visit = stack.append, stack.pop, order.append
+    while stack:
+        index = pop()
+        if visited[index]:
+            continue
+        visited[index] = 1
+        visit(index)
+        if index == v_end:
+            return order
+        # Push in descending order so ascending vertices pop first
+        for i in reversed(indices[indptr[index]:indptr[index + 1]]):
+            if not visited[i]:
+                push(i)
+    return order
+
+
+def _bfs_csr(indptr: list, indices: list, v_start: int, v_end) -> list:
+    """
+    Level-synchronous breadth-first search over CSR arrays,
+    stops at v_end if given
+    """
+    # Vertices are flagged when they join a frontier so each joins once
+    visited = bytearray(len(indptr) - 1)
+    visited[v_start] = 1
+    order = []
+
+    frontier = [v_start]
+    while frontier:
+        # Flagged end vertex can only be in the current level
+        if v_end is not None and visited[v_end]:
+            order.extend(frontier[:frontier.index(v_end) + 1])
+            return order
+        order.extend(frontier)
+
+        # Next level in queue order, neighbors in ascending order
+        next_frontier = []
+        push = next_frontier.append
+        for index in frontier:
+            for i in indices[indptr[index]:indptr[index + 1]]:
+                if not visited[i]:
+                    visited[i] = 1
+                    push(i)
+        frontier = next_frontier
+    return order
+
+
+def _has_cycle_csr(indptr: list, indices: list, v_count: int) -> bool:
+    """
+    Iterative DFS cycle check over CSR arrays, a back edge
+    to a vertex still on the stack means a cycle
+    """
+    # WHITE -> unvisited, GRAY -> on stack, BLACK -> finished
+    white, gray, black = 0, 1, 2
+    color = [white] * v_count
+
+    # Check multiple connected components
+    for root in range(v_count):
+        if color[root] != white:
+            continue
+        color[root] = gray
+        stack = [(root, iter(indices[indptr[root]:indptr[root + 1]]))]
+        push, pop = stack.append, stack.pop
+        while stack:
+            v, neighbors = stack[-1]
+            for i in neighbors:
+                c = color[i]
+                if c == gray:
+                    return True
+                if c == white:
+                    color[i] = gray
+                    push((i, iter(indices[indptr[i]:indptr[i + 1]])))
+                    break
+            # All neighbors explored
+            else:
+                color[v] = black
+                pop()
+    return False
+
+
+def _dfs_mask(row_mask: list, v_start: int, v_end) -> list:
+    """
+    Depth-first search over bitmask rows, stops at v_end if given
+    """
+    seen = 1 << v_start
+    order = [v_start]
+    if v_start == v_end:
+        return order
+
+    # Descend into lowest unvisited neighbor, back-track when none left
+    stack = [v_start]
+    push, pop, visit = stack.append, stack.pop, order.append
+    while stack:
+        todo = row_mask[stack[-1]] & ~seen
+        if todo:
+            bit = todo & -todo
+            i = bit.bit_length() - 1
+            seen |= bit
+            visit(i)
+            if i == v_end:
+                return order
+            push(i)
+        else:
+            pop()
+    return order
+
+
+def _bfs_mask(row_mask: list, v_start: int, v_end) -> list:
+    """
+    Level-synchronous breadth-first search over bitmask rows,
+    stops at v_end if given
+    """
+    seen = 1 << v_start
+    order = []
+
+    frontier = [v_start]
+    while frontier:
+        # Seen end vertex can only be in the current level
+        if v_end is not None and seen >> v_end & 1:
+            order.extend(frontier[:frontier.index(v_end) + 1])
+            return order
+        order.extend(frontier)
+
+        # Next level in queue order, lowest bit first per row
+        next_frontier = []
+        push = next_frontier.append
+        for index in frontier:
+            new = row_mask[index] & ~seen
+            seen |= new
+            while new:
+                bit = new & -new
+                push(bit.bit_length() - 1)
+                new ^= bit
+        frontier = next_frontier
+    return order
+
+
+def _has_cycle_mask(row_mask: list) -> bool:
+    """
+    DFS cycle check over bitmask rows, path holds the GRAY
+    vertices and done the BLACK ones
+    """
+    done = 0
+    for root in range(len(row_mask)):
+        if done >> root & 1:
+            continue
+        stack = [root]
+        push, pop = stack.append, stack.pop
+        path = 1 << root
+        while stack:
+            todo = row_mask[stack[-1]] & ~(path | done)
+            if todo:
+                bit = todo & -todo
+                i = bit.bit_length() - 1
+                # Edge back onto current path
+                if row_mask[i] & path:
+                    return True
+                path |= bit
+                push(i)
+            else:
+                bit = 1 << pop()
+                path ^= bit
+                done |= bit
+    return False
+
+
+def _dijkstra_csr(indptr: list, indices: list, data: list,
+                  src: int, v_count: int) -> list:
+    """
+    Single-source shortest paths over CSR arrays
+    """
+    # Tracks distance from source as indexed array, every unreached
+    # slot points at the same inf object so the list is just pointers
+    distances = [float('inf')] * v_count
+    distances[src] = 0
+
+    # Min-heap of (distance, vertex), closest vertex pops first
+    # Improved vertices are pushed again rather than decreased in
+    # place, heapq runs in C and beats a Python indexed heap
+    pq = [(0, src)]
+    heappush, heappop = heapq.heappush, heapq.heappop
+
+    while pq:
+        d, v = heappop(pq)
+        # Stale entry, shorter path to 'v' already settled
+        if d > distances[v]:
+            continue
+        # Relax whole row of 'v' at once
+        start, end = indptr[v], indptr[v + 1]
+        for i, weight in zip(indices[start:end], data[start:end]):
+            nd = d + weight
+            if nd < distances[i]:
+                distances[i] = nd
+                heappush(pq, (nd, i))
+
+    # Shortest paths to all reachable vertices found
+    return distances
+
 
 class DirectedGraph:
     """
@@ -22,18 +241,42 @@ class DirectedGraph:
         Store graph info as adjacency matrix
         """
         self.v_count = 0
-        self.adj_matrix = []
+
+        # Backing matrix is capacity x capacity, capacity doubles
+        # when full so adding vertices is amortized O(1) row work
+        self._capacity = 0
+        self._matrix = []
+
+        # Read-only v_count x v_count snapshot handed out as adj_matrix,
+        # cached until the next change to the matrix
+        self._snapshot = None
+
+        # Compressed sparse row index over _matrix[:v_count], rebuilt lazily
+        # after edges change -> row i spans indptr[i]:indptr[i + 1]
+        # Source of each entry is kept in rows for bulk edge export
+        self._indptr = [0]
+        self._rows = []
+        self._indices = []
+        self._data = []
+        self._row_mask = []
+        self._csr_dirty = False
 
         # Populate graph with initial vertices and edges (if provided)
-        # Before using, implement add_vertex() and add_edge() methods
+        # Matrix is allocated once at full size, then edges are written
+        # straight in with the same checks as add_edge()
         if start_edges is not None:
             v_count = 0
             for u, v, _ in start_edges:
                 v_count = max(v_count, u, v)
-            for _ in range(v_count + 1):
-                self.add_vertex()
+            v_count += 1
+
+            self.v_count = self._capacity = v_count
+            self._matrix = [[0] * v_count for _ in range(v_count)]
             for u, v, weight in start_edges:
-                self.add_edge(u, v, weight)
+                if weight >= 1 and u != v and u >= 0 and v >= 0:
+                    self._matrix[u][v] = weight
+            self._csr_dirty = True
+            self._snapshot = None
 
     def __str__(self):
         """
@@ -41,28 +284,51 @@ class DirectedGraph:
         """
         if self.v_count == 0:
             return 'EMPTY GRAPH\n'
-        out = '   |'
-        out += ' '.join(['{:2}'.format(i) for i in range(self.v_count)]) + '\n'
-        out += '-' * (self.v_count * 3 + 3) + '\n'
-        for i in range(self.v_count):
-            row = self.adj_matrix[i]
-            out += '{:2} |'.format(i)
-            out += ' '.join(['{:2}'.format(w) for w in row]) + '\n'
-        out = f"GRAPH ({self.v_count} vertices):\n{out}"
-        return out
+        n = self.v_count
+
+        # One template formats a whole row per call, lines joined once
+        row_fmt = ' '.join(['{:2}'] * n).format
+        lines = [f'GRAPH ({n} vertices):',
+                 '   |' + row_fmt(*range(n)),
+                 '-' * (n * 3 + 3)]
+        for i in range(n):
+            lines.append('{:2} |'.format(i) + row_fmt(*self._matrix[i][:n]))
+        return '\n'.join(lines) + '\n'
+
+    @property
+    def adj_matrix(self) -> tuple:
+        """
+        Returns read-only v_count x v_count snapshot of the adjacency
+        matrix, use add_edge()/remove_edge() to change it
+        """
+        if self._snapshot is None:
+            n = self.v_count
+            self._snapshot = tuple(tuple(row[:n]) for row in self._matrix[:n])
+        return self._snapshot
 
     def add_vertex(self) -> int:
         """
         Adds vertex, returns # of vertices
         """
-        self.adj_matrix.append([0]) 
+        # Double capacity once backing matrix is full
+        if self.v_count == self._capacity:
+            capacity = max(1, 2 * self._capacity)
+            grow = capacity - self._capacity
+            for row in self._matrix:
+                row.extend([0] * grow)
+            self._matrix.extend([0] * capacity for _ in range(grow))
+            self._capacity = capacity
         self.v_count += 1
-
-        # Update number of columns in each row
-        for _ in range(self.v_count - 1):
-            self.adj_matrix[self.v_count - 1].append(0)
-        for i in range(self.v_count - 1):
-            self.adj_matrix[i].append(0)
+        self._snapshot = None
+
+        # New vertex has no edges, so its CSR row is empty
+        # Row bitmasks are kept only for small graphs, same as rebuild
+        if not self._csr_dirty:
+            self._indptr.append(self._indptr[-1])
+            if self.v_count <= _SMALL_GRAPH:
+                self._row_mask.append(0)
+            else:
+                self._row_mask = []
         return self.v_count
 
     def add_edge(self, src: int, dst: int, weight=1) -> None:
@@ -74,7 +340,9 @@ class DirectedGraph:
             return
     
         else:
-            self.adj_matrix[src][dst] = weight
+            self._matrix[src][dst] = weight
+            self._csr_dirty = True
+            self._snapshot = None
 
     def remove_edge(self, src: int, dst: int) -> None:
         """
@@ -84,8 +352,59 @@ class DirectedGraph:
             or src < 0 or dst < 0:
             return
 
-        else:
-            self.adj_matrix[src][dst] = 0
+        elif self._matrix[src][dst] > 0:
+            self._matrix[src][dst] = 0
+            self._csr_dirty = True
+            self._snapshot = None
+
+    def _rebuild_csr(self) -> None:
+        """
+        Rebuilds CSR arrays from adjacency matrix, rows stay
+        sorted by destination index, small graphs get row bitmasks
+        """
+        indptr = [0]
+        rows = []
+        indices = []
+        data = []
+        row_mask = []
+        small = self.v_count <= _SMALL_GRAPH
+        for i in range(self.v_count):
+            mask = 0
+            for j, weight in enumerate(self._matrix[i][:self.v_count]):
+                if weight > 0:
+                    indices.append(j)
+                    data.append(weight)
+                    mask |= 1 << j
+            rows.extend([i] * (len(indices) - indptr[-1]))
+            indptr.append(len(indices))
+            if small:
+                row_mask.append(mask)
+
+        self._indptr = indptr
+        self._rows = rows
+        self._indices = indices
+        self._data = data
+        self._row_mask = row_mask
+        self._csr_dirty = False
+
+    def _csr(self) -> tuple:
+        """
+        Returns up-to-date CSR arrays -> (indptr, indices, data)
+        """
+        if self._csr_dirty:
+            self._rebuild_csr()
+        return self._indptr, self._indices, self._data
+
+    def to_scipy_csr(self):
+        """
+        Returns graph as scipy.sparse.csr_matrix so heavy algorithms
+        can run in scipy.sparse.csgraph, requires SciPy
+        """
+        from scipy.sparse import csr_matrix
+
+        indptr, indices, data = self._csr()
+        return csr_matrix((data, indices, indptr),
+                          shape=(self.v_count, self.v_count))
 
     def get_vertices(self) -> list:
         """
@@ -100,126 +419,59 @@ class DirectedGraph:
         """
         Returns list of edges as tuples -> (src,dst,weight)
         """
-        edges = []
-        for i in range(self.v_count):
-            for j in range(self.v_count):
-                if self.adj_matrix[i][j] > 0:
-                    edges.append((i, j, self.adj_matrix[i][j]))
-        return edges
+        _, indices, data = self._csr()
+        # CSR entries are already in (src, dst) order
+        return list(zip(self._rows, indices, data))
 
     def is_valid_path(self, path: list) -> bool:
         """
         Determines if list of index vertices is valid path
         """
-        if len(path) > 1:
-            for i in range(len(path) - 1):
-                if self.adj_matrix[path[i]][path[i+1]] == 0:
-                    return False
-        return True
+        # Every consecutive (src, dst) pair needs a nonzero weight,
+        # empty and single-vertex paths have no pairs
+        matrix = self._matrix
+        return all(matrix[src][dst] for src, dst in zip(path, path[1:]))
 
     def dfs(self, v_start, v_end=None) -> list:
         """
         Performs depth-first search and returns list
         of visited vertices in order of visit
         """
-        visited = []
-
         # Catch invalid indices
-        if v_start < 0 or v_start >= len(self.adj_matrix):
-            return visited
-        elif v_end is not None:
-            if v_end < 0 or v_end >= len(self.adj_matrix):
-                v_end = None
+        if v_start < 0 or v_start >= self.v_count:
+            return []
+        if v_end is not None and (v_end < 0 or v_end >= self.v_count):
+            v_end = None
 
-        # Stack goes as deep as possible, then back-tracks
-        else:
-            stack = [v_start]
-            while stack:
-                index = stack.pop()
-                if index not in visited:
-                    visited.append(index)
-                v = self.adj_matrix[index]
-                # Check vertices in ascending order
-                for i in range(len(v) - 1, -1, -1):
-                    if v[i] > 0 and i not in visited:
-                        stack.append(i)
-                    if i == v_end:
-                        visited.append(i)
-                        return visited
-            return visited            
+        indptr, indices, _ = self._csr()
+        if self.v_count <= _SMALL_GRAPH:
+            return _dfs_mask(self._row_mask, v_start, v_end)
+        return _dfs_csr(indptr, indices, v_start, v_end)
 
     def bfs(self, v_start, v_end=None) -> list:
         """
         Performs breadth-first search and returns list
         of visited vertices in order of visit
         """
-        visited = []
-
         # Catch invalid indices
-        if v_start < 0 or v_start >= len(self.adj_matrix):
-            return visited
-        elif v_end is not None:
-            if v_end < 0 or v_end >= len(self.adj_matrix):
-                v_end = None
+        if v_start < 0 or v_start >= self.v_count:
+            return []
+        if v_end is not None and (v_end < 0 or v_end >= self.v_count):
+            v_end = None
 
-        else:
-            queue = [v_start]
-            while queue:
-                index = queue.pop(0)
-                if index not in visited:
-                    visited.append(index)
-                v = self.adj_matrix[index]
-                # Check vertices in ascending order
-                for i in range(self.v_count):
-                    if v[i] > 0 and i not in visited:
-                        queue.append(i)
-                    if i == v_end:
-                        visited.append(i)
-                        return visited
-            return visited
+        indptr, indices, _ = self._csr()
+        if self.v_count <= _SMALL_GRAPH:
+            return _bfs_mask(self._row_mask, v_start, v_end)
+        return _bfs_csr(indptr, indices, v_start, v_end)
 
     def has_cycle(self) -> bool:
         """
         Determines if graph has at least one cycle
         """
-        # Check multiple connected components
-        for i in range(self.v_count):
-            # Initialize visited list with root
-            visited = [i]
-            # Initialize stack with 2nd-degree neighbors
-            adjacent_list = []
-            for j in range(self.v_count):
-                if self.adj_matrix[i][j] > 0:
-                    adjacent_list.append(j)    
-            for adjacent in adjacent_list:
-                neighbor_list = []
-                for k in range(self.v_count):
-                    if self.adj_matrix[adjacent][k] > 0:
-                        neighbor_list.append(k)
-                result = self.has_cycle_helper(adjacent, visited, neighbor_list)
-                if result is True:
-                    return True
-        return False
-
-    def has_cycle_helper(self, vertex, visited: list, stack: list) -> bool:
-        while stack != []:
-            v = stack.pop()
-            # Check 2nd-degree neighbors for any cycle
-            for i in visited:
-                if self.adj_matrix[v][i] > 0:
-                    return True
-            # Pass down new lists to next recursive level
-            else:
-                new_visited = visited.copy()
-                new_visited.append(vertex)
-                new_stack = []
-                for j in range(self.v_count):
-                    if self.adj_matrix[v][j] > 0:
-                        new_stack.append(j)
-                result = self.has_cycle_helper(v, new_visited, new_stack)
-                if result is True:
-                    return True
-        return False
+        indptr, indices, _ = self._csr()
+        if self.v_count <= _SMALL_GRAPH:
+            return _has_cycle_mask(self._row_mask)
+        return _has_cycle_csr(indptr, indices, self.v_count)
 
     def dijkstra(self, src: int) -> list:
         """
@@ -227,26 +479,30 @@ class DirectedGraph:
         to all other vertices from source input, unreachable vertices
         have value float('inf')
         """
-        # Tracks distance from source as indexed array
-        distances = [float('inf')] * self.v_count
-        distances[src] = 0
+        indptr, indices, data = self._csr()
+        return _dijkstra_csr(indptr, indices, data, src, self.v_count)
 
-        # Queue keeps track of adjacents, keeps out already-visited nodes
-        queue = [src]
+    def all_pairs_shortest_paths(self, workers=None) -> list:
+        """
+        Computes shortest path lengths between every pair of vertices,
+        row i matches dijkstra(i), optionally across worker processes
+        """
+        if workers is not None and workers < 1:
+            raise ValueError('workers must be at least 1')
 
-        while queue:
-            v = queue.pop(0)
-            for i in range(self.v_count):
-                if self.adj_matrix[v][i] > 0:
-                    # Queue will only update with shortest path from 'v' to its adjacents
-                    if (distances[v] + self.adj_matrix[v][i]) < distances[i]:
-                        distances[i] = distances[v] + self.adj_matrix[v][i]
-                        # Visited nodes have already loaded their adjacents into queue
-                        if i not in queue:
-                            queue.append(i)
+        # One CSR snapshot shared by every source
+        indptr, indices, data = self._csr()
+        if workers is None or self.v_count < _PARALLEL_MIN_VERTICES:
+            return [_dijkstra_csr(indptr, indices, data, src, self.v_count)
+                    for src in range(self.v_count)]
 
-        # Shortest paths to all reachable vertices found
-        return distances
+        # Sources are independent, hand each worker a chunk of them
+        kernel = partial(_dijkstra_csr, indptr, indices, data)
+        chunksize = max(1, self.v_count // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(kernel, range(self.v_count),
+                                     repeat(self.v_count),
+                                     chunksize=chunksize))
 
 
 if __name__ == '__main__':
@@ -327,3 +583,12 @@ if __name__ == '__main__':
     print('\n', g)
     for i in range(5):
         print(f'DIJKSTRA {i} {g.dijkstra(i)}')
+
+    # All-pairs shortest paths
+    print("\nall_pairs_shortest_paths() example 1")
+    print("------------------------------------------")
+    edges = [(0, 1, 10), (4, 0, 12), (1, 4, 15), (4, 3, 3),
+             (3, 1, 5), (2, 1, 23), (3, 2, 7)]
+    g = DirectedGraph(edges)
+    for i, distances in enumerate(g.all_pairs_shortest_paths()):
+        print(f'ALL PAIRS {i} {distances}')
@@ -7,6 +7,8 @@
 #    For educational use only,
 #    Not for commercial use
 
+from collections import deque
+
 
 class UndirectedGraph:
     """
@@ -155,21 +157,27 @@ class UndirectedGraph:
         if v_end not in self.adj_list.keys():
             v_end = None
 
+        # Set gives O(1) visit checks, list keeps visit order
         reachable = []
+        visited = set()
         stack = [v_start]
+        adj_list = self.adj_list
+        push, pop = stack.append, stack.pop
         
-        while stack != []:
-            v = stack.pop()
+        while stack:
+            v = pop()
             
             if v == v_end:
                 reachable.append(v)
                 return reachable
 
             # Travel to next vertex in alphabetical order
-            if v not in reachable:
+            if v not in visited:
+                visited.add(v)
                 reachable.append(v)
-                for neighbor in sorted(self.adj_list[v], reverse=True):
-                    stack.append(neighbor)
+                for neighbor in sorted(adj_list[v], reverse=True):
+                    if neighbor not in visited:
+                        push(neighbor)
         
         return reachable
                 
@@ -184,21 +192,26 @@ class UndirectedGraph:
         if v_end not in self.adj_list.keys():
             v_end = None
 
+        # Set gives O(1) visit checks, list keeps visit order
         reachable = []
-        queue = [v_start]
+        visited = set()
+        queue = deque([v_start])
+        adj_list = self.adj_list
+        push, pop = queue.append, queue.popleft
     
-        while queue != []:
-            v = queue.pop(0)
+        while queue:
+            v = pop()
 
             if v == v_end:
                 reachable.append(v)
                 return reachable
 
-            if v not in reachable:
+            if v not in visited:
+                visited.add(v)
                 reachable.append(v)
-                for neighbor in sorted(self.adj_list[v]):
-                    if neighbor not in reachable:
-                        queue.append(neighbor)
+                for neighbor in sorted(adj_list[v]):
+                    if neighbor not in visited:
+                        push(neighbor)
 
         return reachable
 
@@ -206,59 +219,59 @@ class UndirectedGraph:
         """
         Return number of connected componets in the graph
         """
-        complete = sorted(self.adj_list.keys())
-        v = complete[0]
-        total_comps = []
+        adj_list = self.adj_list
+        visited = set()
         quantity = 0
 
-        while total_comps != complete:
+        # Each root not reached from an earlier one starts a new component
+        for root in adj_list:
+            if root in visited:
+                continue
             quantity += 1
-            total_comps.extend(self.bfs(v))
-
-            # Complete list of vertices are already sorted
-            if sorted(total_comps) == complete:
-                return quantity
-
-            # Cast to sets and find disconnected component
-            else:
-                v = list(set(complete).difference(set(total_comps)))[0]
+            visited.add(root)
+            stack = [root]
+            while stack:
+                for neighbor in adj_list[stack.pop()]:
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        stack.append(neighbor)
+        return quantity
 
     def has_cycle(self) -> bool:
         """
         Return True if graph contains a cycle, False otherwise
         """
+        visited = set()
+
         # Check multiple connected components
-        for i in list(self.adj_list.keys()):
-            # Initialize visited list with root
-            visited = [i]
-            # Initialize stack with 2nd-degree neighbors
-            for adjacent in self.adj_list[i]:
-                stack = []
-                for neighbor in self.adj_list[adjacent]:
-                    if neighbor != i:
-                        stack.append(neighbor)
-                result = self.has_cycle_helper(adjacent, visited, stack)
-                if result is True:
+        for i in self.adj_list:
+            if i not in visited:
+                if self.has_cycle_helper(i, visited):
                     return True
         return False
 
-    def has_cycle_helper(self, vertex, visited: list, stack: list) -> bool:
-        while stack != []:
-            v = stack.pop()
-            # Check 2nd-degree neighbors for any backedge
-            if not set(self.adj_list[v]).isdisjoint(set(visited)):
-                return True
-            # Pass down new lists to next recursive level
+    def has_cycle_helper(self, root, visited: set) -> bool:
+        adj_list = self.adj_list
+        visited.add(root)
+
+        # Explicit stack of (vertex, parent, unexplored neighbors)
+        # stands in for recursion, so depth is not limited
+        stack = [(root, None, iter(adj_list[root]))]
+        while stack:
+            vertex, parent, neighbors = stack[-1]
+            for neighbor in neighbors:
+                # Reaching a visited vertex other than the one we came
+                # from closes a cycle
+                if neighbor in visited:
+                    if neighbor != parent:
+                        return True
+                else:
+                    visited.add(neighbor)
+                    stack.append((neighbor, vertex, iter(adj_list[neighbor])))
+                    break
+            # All neighbors explored
             else:
-                new_visited = visited.copy()
-                new_visited.append(vertex)
-                new_stack = []
-                for adjacent in self.adj_list[v]:
-                    if adjacent != vertex:
-                        new_stack.append(adjacent)
-                result = self.has_cycle_helper(v, new_visited, new_stack)
-                if result is True:
-                    return True
+                stack.pop()
         return False
 
 